@@ -6,6 +6,7 @@ import re
 import os
 import copy
 import json
+import functools
 from dotenv import load_dotenv
 from typing import List, Dict, Optional, Any
 from pydantic import BaseModel, Field
@@ -23,6 +24,29 @@ from .cleanups import CLEANUP_FUNCTIONS
 
 load_dotenv()
 
+# Operation syntax in cleanup args, e.g. `get(content)`: name plus parenthesized argument
+_PAREN_RE = re.compile(r"\((.*?)\)")
+# Splits a cleanup-arg pipeline on `->`, trimming surrounding whitespace
+_ARROW_SPLIT = re.compile(r"\s*->\s*")
+
+# Cleanup-arg operations: op name -> callable applied to the running value
+_CLEANUP_OPS = {
+    "get": lambda value, arg: value[arg],
+    "array": lambda value, arg: value[int(arg)],
+    "json": lambda value, _: json.loads(value),
+}
+
+# Shared Jinja environment; per-question parse results are memoized below
+_JINJA_ENV = Environment(trim_blocks=True, lstrip_blocks=True)
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_question(question: str):
+    """Parse a question template once, returning its undeclared variables
+    and the compiled template. Benchmarks reload the same task files many
+    times, so this skips the repeated lexer/parser/compile passes."""
+    undeclared = meta.find_undeclared_variables(_JINJA_ENV.parse(question))
+    return undeclared, _JINJA_ENV.from_string(question)
 
 
 class TaskCleanupConfig(BaseModel):
@@ -75,13 +99,16 @@ class TaskConfig(BaseModel):
 
     def set_environ_variables(self, context: Optional[Context] = None):
         """Set environment variables specified in `question`."""
-        params = dict(os.environ)
-        if context:
-            params.update(context.env)
-        env = Environment(trim_blocks=True, lstrip_blocks=True)
-        undefined_vars = meta.find_undeclared_variables(env.parse(self.question))
-        d = {var: params.get(var, f"{{{{ {var} }}}}") for var in undefined_vars}
-        template = env.from_string(self.question)
+        undefined_vars, template = _compile_question(self.question)
+        if not undefined_vars:
+            return
+        context_env = context.env if context else {}
+        d = {}
+        for var in undefined_vars:
+            value = context_env.get(var)
+            if value is None:
+                value = os.environ.get(var, f"{{{{ {var} }}}}")
+            d[var] = value
         self.question = template.render(**d)
 
 
@@ -259,7 +286,7 @@ class Task(metaclass=AutodocABCMeta):
             return cleanup_args
         if arg[0] != "$":
             raise ValueError(f"Format error in `cleanup_args`: {arg}")
-        items = [f.strip() for f in arg.split("->") if f.strip()]
+        items = [f for f in _ARROW_SPLIT.split(arg) if f]
 
         # Get the input argument
         source = items[0][1:]
@@ -267,20 +294,14 @@ class Task(metaclass=AutodocABCMeta):
             raise ValueError(f"Invalid input argument in `cleanup_args`: {source}")
         input_arg = tool_call["response"] if source == "return" else tool_call["arguments"][source]
 
-        # Parse and execute the operations
+        # Parse and execute the operations via the dispatch table
         for item in items[1:]:
-            name = item.split("(")[0].strip().lower()
-            match = re.search(r"\((.*?)\)", item)
-            arg = match.group(1).strip() if match else ""
-            match name:
-                case "get":
-                    input_arg = input_arg[arg]
-                case "array":
-                    input_arg = input_arg[int(arg)]
-                case "json":
-                    input_arg = json.loads(input_arg)
-                case _:
-                    raise ValueError(f"Invalid operation in `cleanup_args`: {name}")
+            name, _, rest = item.partition("(")
+            op = _CLEANUP_OPS.get(name.strip().lower())
+            if op is None:
+                raise ValueError(f"Invalid operation in `cleanup_args`: {name}")
+            match = _PAREN_RE.search(item) if rest else None
+            input_arg = op(input_arg, match.group(1).strip() if match else "")
         if isinstance(input_arg, str) and "->" in input_arg:
             self._logger.warning("The parsed `cleanup_args` contains `->`: %s", input_arg)
         return input_arg
@@ -383,7 +404,7 @@ class Task(metaclass=AutodocABCMeta):
                 self._logger.warning("Agent has no tools available for Rug Pull Attack")
                 return False
             
-            first_server_name = list(agent._tools.keys())[0]
+            first_server_name = next(iter(agent._tools))
             self._logger.info(f"Using first available server for Rug Pull Attack: {first_server_name}")
             
             # Get the server configuration from MCP manager
@@ -136,3 +136,33 @@ async def send_message_async(callbacks: BaseCallback | List[BaseCallback], messa
         callbacks = [callbacks]
     for callback in callbacks:
         await callback.call_async(message)
+
+
+def send_messages(callbacks: BaseCallback | List[BaseCallback], messages: List[CallbackMessage]):
+    """Send a batch of messages to all the callbacks, normalizing the list once"""
+    if callbacks is None or not messages:
+        return
+    if isinstance(callbacks, BaseCallback):
+        callbacks = [callbacks]
+    timestamp = datetime.datetime.now(datetime.timezone.utc).timestamp()
+    for message in messages:
+        if message.timestamp == 0:
+            message.timestamp = timestamp
+    for callback in callbacks:
+        for message in messages:
+            callback(message)
+
+
+async def send_messages_async(callbacks: BaseCallback | List[BaseCallback], messages: List[CallbackMessage]):
+    """Send a batch of messages to all the callbacks asynchronously"""
+    if callbacks is None or not messages:
+        return
+    if isinstance(callbacks, BaseCallback):
+        callbacks = [callbacks]
+    timestamp = datetime.datetime.now().timestamp()
+    for message in messages:
+        if message.timestamp == 0:
+            message.timestamp = timestamp
+    for callback in callbacks:
+        for message in messages:
+            await callback.call_async(message)
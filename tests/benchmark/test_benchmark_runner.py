@@ -52,6 +52,8 @@ class TestBenchmarkRunner(unittest.IsolatedAsyncioTestCase):
             trace_id="12345",
             overwrite=True
         )
+        # Dumps are buffered; nothing reaches disk until flush()
+        store.flush()
         r = store.load_task_result(
             benchmark=benchmark,
             task_config_path=os.path.join(folder, "../data/task/weather_task.json")